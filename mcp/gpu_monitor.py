@@ -1,12 +1,85 @@
-"""nvidia-smi wrapper for GPU monitoring."""
+"""GPU monitoring via NVML, falling back to nvidia-smi."""
 
 import asyncio
+import copy
+import csv
+import io
 import json
+import os
 import subprocess
+import threading
+from time import monotonic
+
+try:
+    import pynvml
+except ImportError:  # nvidia-ml-py not installed -- use nvidia-smi
+    pynvml = None
+
+# How long (seconds) an nvidia-smi result is reused before forking again.
+TTL = float(os.environ.get("GPU_MONITOR_TTL", "1.0"))
+
+# Refresh period of the long-lived `nvidia-smi -lms` streamers.
+STREAM_INTERVAL_MS = int(os.environ.get("GPU_MONITOR_INTERVAL_MS", "500"))
+
+# Streamed data older than this is not trusted; fall back to a one-shot query.
+_STALE = 2 * STREAM_INTERVAL_MS / 1000 + 0.25
+
+# Minimum seconds between streamer launches, so a broken driver that makes
+# nvidia-smi exit immediately doesn't cost two extra forks per call.
+_STREAM_BACKOFF = 30.0
+
+GPU_QUERY = (
+    "--query-gpu=index,name,memory.total,memory.used,memory.free,"
+    "utilization.gpu,temperature.gpu,power.draw,power.limit"
+)
+PROC_QUERY = "--query-compute-apps=pid,name,gpu_uuid,used_gpu_memory"
+CSV_FORMAT = "--format=csv,noheader,nounits"
+
+_SMI_CACHE: dict[tuple, tuple[float, str]] = {}
+_SMI_LOCKS: dict[tuple, asyncio.Lock] = {}
+_SNAPSHOT: tuple[float, dict] | None = None
+
+# Latest values pushed by the streamers
+_LATEST_GPU: dict[int, dict] = {}
+_LATEST_PROCS: dict[tuple[int, str], tuple[float, dict]] = {}
+_gpu_updated: float = 0.0
+_stream_started: float = 0.0
+_stream_retry_at: float = 0.0
+
+_streamers: list[tuple[asyncio.subprocess.Process, asyncio.Task]] = []
+_streamer_lock = asyncio.Lock()
+
+# NVML state: (handle, name, uuid) per device, fetched once at init
+_NVML_INITED = False
+_NVML_FAILED = False
+_HANDLES: list = []
+_nvml_lock = threading.Lock()
+_MIB = 1024 * 1024
 
 
 async def _run_smi(*args: str) -> str:
-    """Run nvidia-smi with the given args and return stdout."""
+    """Run nvidia-smi with the given args and return stdout.
+
+    Results are cached per argv for TTL seconds; concurrent callers with the
+    same args share a single subprocess.
+    """
+    key = args
+    hit = _SMI_CACHE.get(key)
+    if hit and monotonic() - hit[0] < TTL:
+        return hit[1]
+
+    lock = _SMI_LOCKS.setdefault(key, asyncio.Lock())
+    async with lock:
+        hit = _SMI_CACHE.get(key)
+        if hit and monotonic() - hit[0] < TTL:
+            return hit[1]
+        out = await _exec_smi(*args)
+        _SMI_CACHE[key] = (monotonic(), out)
+        return out
+
+
+async def _exec_smi(*args: str) -> str:
+    """Fork nvidia-smi once and return stdout."""
     proc = await asyncio.create_subprocess_exec(
         "nvidia-smi", *args,
         stdout=asyncio.subprocess.PIPE,
@@ -18,49 +91,312 @@ async def _run_smi(*args: str) -> str:
     return stdout.decode().strip()
 
 
-async def gpu_info() -> dict:
-    """VRAM, utilization, temperature, power for each GPU."""
-    csv = await _run_smi(
-        "--query-gpu=index,name,memory.total,memory.used,memory.free,"
-        "utilization.gpu,temperature.gpu,power.draw,power.limit",
-        "--format=csv,noheader,nounits",
-    )
+# ---------------------------------------------------------------------------
+# NVML
+# ---------------------------------------------------------------------------
+
+def _str(value) -> str:
+    # Older pynvml releases return bytes
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def ensure_init() -> bool:
+    """Initialize NVML and cache device handles. Returns False if unavailable."""
+    global _NVML_INITED, _NVML_FAILED
+    if _NVML_INITED:
+        return True
+    if pynvml is None or _NVML_FAILED:
+        return False
+    with _nvml_lock:
+        if _NVML_INITED:
+            return True
+        try:
+            pynvml.nvmlInit()
+            handles = []
+            for i in range(pynvml.nvmlDeviceGetCount()):
+                h = pynvml.nvmlDeviceGetHandleByIndex(i)
+                handles.append((
+                    h,
+                    _str(pynvml.nvmlDeviceGetName(h)),
+                    _str(pynvml.nvmlDeviceGetUUID(h)),
+                ))
+        except pynvml.NVMLError:
+            _NVML_FAILED = True
+            return False
+        _HANDLES[:] = handles
+        _NVML_INITED = True
+    return True
+
+
+def _nvml_opt(fn, *args):
+    """Call an NVML getter, mapping NVMLError (e.g. Not Supported) to None."""
+    try:
+        return fn(*args)
+    except pynvml.NVMLError:
+        return None
+
+
+def _watts(mw: int | None) -> float | None:
+    return round(mw / 1000, 2) if mw is not None else None
+
+
+def _nvml_gpu_info() -> dict:
     gpus = []
-    for line in csv.splitlines():
-        parts = [p.strip() for p in line.split(",")]
-        if len(parts) < 9:
-            continue
+    for i, (h, name, _) in enumerate(_HANDLES):
+        mem = pynvml.nvmlDeviceGetMemoryInfo(h)
+        util = _nvml_opt(pynvml.nvmlDeviceGetUtilizationRates, h)
         gpus.append({
-            "index": int(parts[0]),
-            "name": parts[1],
-            "vram_total_mb": int(parts[2]),
-            "vram_used_mb": int(parts[3]),
-            "vram_free_mb": int(parts[4]),
-            "utilization_pct": int(parts[5]),
-            "temperature_c": int(parts[6]),
-            "power_draw_w": float(parts[7]),
-            "power_limit_w": float(parts[8]),
+            "index": i,
+            "name": name,
+            "vram_total_mb": mem.total // _MIB,
+            "vram_used_mb": mem.used // _MIB,
+            "vram_free_mb": mem.free // _MIB,
+            "utilization_pct": util.gpu if util is not None else None,
+            "temperature_c": _nvml_opt(
+                pynvml.nvmlDeviceGetTemperature, h, pynvml.NVML_TEMPERATURE_GPU
+            ),
+            "power_draw_w": _watts(_nvml_opt(pynvml.nvmlDeviceGetPowerUsage, h)),
+            "power_limit_w": _watts(
+                _nvml_opt(pynvml.nvmlDeviceGetPowerManagementLimit, h)
+            ),
         })
     return {"gpus": gpus}
 
 
-async def gpu_process_list() -> dict:
-    """Processes currently using GPU resources."""
-    csv = await _run_smi(
-        "--query-compute-apps=pid,name,gpu_uuid,used_gpu_memory",
-        "--format=csv,noheader,nounits",
-    )
+def _nvml_process_list() -> dict:
     processes = []
-    for line in csv.splitlines():
-        if not line.strip():
+    for h, _, uuid in _HANDLES:
+        for p in pynvml.nvmlDeviceGetComputeRunningProcesses(h):
+            try:
+                name = _str(pynvml.nvmlSystemGetProcessName(p.pid))
+            except pynvml.NVMLError:
+                name = ""
+            # usedGpuMemory is None under WDDM on Windows
+            used = p.usedGpuMemory
+            processes.append({
+                "pid": p.pid,
+                "process_name": name,
+                "gpu_uuid": uuid,
+                "vram_used_mb": used // _MIB if used is not None else None,
+            })
+    return {"processes": processes}
+
+
+def _nvml_shutdown():
+    global _NVML_INITED
+    with _nvml_lock:
+        if _NVML_INITED:
+            _NVML_INITED = False
+            _HANDLES.clear()
+            pynvml.nvmlShutdown()
+
+
+async def _use_nvml() -> bool:
+    return _NVML_INITED or await asyncio.to_thread(ensure_init)
+
+
+# ---------------------------------------------------------------------------
+# CSV row parsing
+# ---------------------------------------------------------------------------
+
+def _rows(text: str):
+    """csv.reader over nvidia-smi output; strips the space after each comma."""
+    return csv.reader(io.StringIO(text), skipinitialspace=True)
+
+
+def _opt(value: str, conv):
+    """Convert a field, mapping [N/A] / [Not Supported] to None."""
+    return None if value.startswith("[") else conv(value)
+
+
+def _parse_gpu(row: list[str], int=int, float=float) -> dict | None:
+    if len(row) < 9:
+        return None
+    idx, name, total, used, free, util, temp, pdraw, plimit = row[:9]
+    return {
+        "index": int(idx),
+        "name": name,
+        "vram_total_mb": int(total),
+        "vram_used_mb": int(used),
+        "vram_free_mb": int(free),
+        # [N/A] on MIG / vGPU devices
+        "utilization_pct": _opt(util, int),
+        "temperature_c": _opt(temp, int),
+        "power_draw_w": _opt(pdraw, float),
+        "power_limit_w": _opt(plimit, float),
+    }
+
+
+def _parse_proc(row: list[str], int=int) -> dict | None:
+    if len(row) < 4:
+        return None
+    pid, name, uuid, used = row[:4]
+    return {
+        "pid": int(pid),
+        "process_name": name,
+        "gpu_uuid": uuid,
+        # [N/A] under WDDM on Windows
+        "vram_used_mb": _opt(used, int),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Long-lived streamers
+# ---------------------------------------------------------------------------
+
+def _on_gpu_line(line: str):
+    global _gpu_updated
+    for row in _rows(line):
+        gpu = _parse_gpu(row)
+        if gpu is None:
             continue
-        parts = [p.strip() for p in line.split(",")]
-        if len(parts) < 4:
+        _LATEST_GPU[gpu["index"]] = gpu
+        _gpu_updated = monotonic()
+
+
+def _on_proc_line(line: str):
+    for row in _rows(line):
+        proc = _parse_proc(row)
+        if proc is None:
             continue
-        processes.append({
-            "pid": int(parts[0]),
-            "process_name": parts[1],
-            "gpu_uuid": parts[2],
-            "vram_used_mb": int(parts[3]),
-        })
+        _LATEST_PROCS[(proc["pid"], proc["gpu_uuid"])] = (monotonic(), proc)
+
+
+async def _stream_reader(proc: asyncio.subprocess.Process, on_line):
+    """Feed each stdout line of a looping nvidia-smi into on_line."""
+    async for raw in proc.stdout:
+        try:
+            on_line(raw.decode("utf-8", errors="replace"))
+        except ValueError:
+            # Malformed row -- skip it rather than kill the reader
+            continue
+
+
+def _streamers_alive() -> bool:
+    return bool(_streamers) and all(p.returncode is None for p, _ in _streamers)
+
+
+async def _ensure_streamer():
+    """Launch the looping nvidia-smi children if they aren't running.
+
+    Launches are rate-limited to one per _STREAM_BACKOFF seconds; in between,
+    callers use the one-shot fallback.
+    """
+    global _stream_started, _stream_retry_at
+    if _streamers_alive() or monotonic() < _stream_retry_at:
+        return
+    async with _streamer_lock:
+        if _streamers_alive() or monotonic() < _stream_retry_at:
+            return
+        await _stop_streamers()
+        _stream_retry_at = monotonic() + _STREAM_BACKOFF
+        for query, on_line in ((GPU_QUERY, _on_gpu_line), (PROC_QUERY, _on_proc_line)):
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    "nvidia-smi", query, CSV_FORMAT, "-lms", str(STREAM_INTERVAL_MS),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                )
+            except OSError:
+                # nvidia-smi missing -- callers fall back to _run_smi and
+                # surface the error there.
+                return
+            task = asyncio.get_running_loop().create_task(_stream_reader(proc, on_line))
+            _streamers.append((proc, task))
+        _stream_started = monotonic()
+
+
+async def shutdown():
+    """Shut down NVML and terminate the streamers. Safe to call repeatedly."""
+    global _stream_retry_at
+    _nvml_shutdown()
+    await _stop_streamers()
+    _stream_retry_at = 0.0
+
+
+async def _stop_streamers():
+    while _streamers:
+        proc, task = _streamers.pop()
+        task.cancel()
+        if proc.returncode is None:
+            try:
+                proc.terminate()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+    _LATEST_GPU.clear()
+    _LATEST_PROCS.clear()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+async def gpu_info() -> dict:
+    """VRAM, utilization, temperature, power for each GPU."""
+    if await _use_nvml():
+        return await asyncio.to_thread(_nvml_gpu_info)
+
+    await _ensure_streamer()
+    if _LATEST_GPU and monotonic() - _gpu_updated < _STALE:
+        return {"gpus": [dict(g) for _, g in sorted(_LATEST_GPU.items())]}
+
+    text = await _run_smi(GPU_QUERY, CSV_FORMAT)
+    gpus = []
+    for row in _rows(text):
+        gpu = _parse_gpu(row)
+        if gpu is not None:
+            gpus.append(gpu)
+    return {"gpus": gpus}
+
+
+async def gpu_process_list() -> dict:
+    """Processes currently using GPU resources."""
+    if await _use_nvml():
+        return await asyncio.to_thread(_nvml_process_list)
+
+    await _ensure_streamer()
+    now = monotonic()
+    if _streamers_alive() and now - _stream_started >= _STALE:
+        # The streamer prints nothing on ticks with no processes, so entries
+        # age out instead of being replaced.
+        for key, (seen, _) in list(_LATEST_PROCS.items()):
+            if now - seen >= _STALE:
+                del _LATEST_PROCS[key]
+        return {"processes": [dict(p) for _, p in _LATEST_PROCS.values()]}
+
+    text = await _run_smi(PROC_QUERY, CSV_FORMAT)
+    processes = []
+    for row in _rows(text):
+        proc = _parse_proc(row)
+        if proc is not None:
+            processes.append(proc)
     return {"processes": processes}
+
+
+async def snapshot() -> dict:
+    """GPU stats and GPU processes together, fetched concurrently.
+
+    Each half degrades on its own: a failed GPU query is reported under
+    "error" and a failed process query under "processes_error". Complete
+    results are cached for TTL seconds so the query cost is paid at most
+    once per tick.
+    """
+    global _SNAPSHOT
+    if _SNAPSHOT and monotonic() - _SNAPSHOT[0] < TTL:
+        return copy.deepcopy(_SNAPSHOT[1])
+    info, procs = await asyncio.gather(
+        gpu_info(), gpu_process_list(), return_exceptions=True
+    )
+    result = {}
+    if isinstance(info, Exception):
+        result["error"] = str(info)
+    else:
+        result.update(info)
+    if isinstance(procs, Exception):
+        result["processes_error"] = str(procs)
+    else:
+        result.update(procs)
+    if not isinstance(info, Exception) and not isinstance(procs, Exception):
+        _SNAPSHOT = (monotonic(), copy.deepcopy(result))
+    return result
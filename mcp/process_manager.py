@@ -4,7 +4,6 @@ import asyncio
 import signal
 import subprocess
 import time
-from collections import deque
 from pathlib import Path
 
 # voice-service root (one level up from mcp/)
@@ -27,20 +26,52 @@ SERVICE_CONFIG = {
 
 LOG_BUFFER_SIZE = 500
 
+# Bytes pulled from a service's stdout per read, and the StreamReader limit
+READ_CHUNK = 1 << 16
+PIPE_LIMIT = 1 << 20
+
 
 class ManagedService:
     """Tracks a running subprocess and its log ring buffer."""
 
     def __init__(self, name: str):
         self.name = name
-        self.process: subprocess.Popen | None = None
-        self.logs: deque[str] = deque(maxlen=LOG_BUFFER_SIZE)
+        self.port = SERVICE_CONFIG[name]["port"]
+        self.process: asyncio.subprocess.Process | None = None
+        # Fixed-size log ring: _logi is the next write slot, _logn the fill
+        self._logbuf: list[str | None] = [None] * LOG_BUFFER_SIZE
+        self._logi = 0
+        self._logn = 0
         self.started_at: float | None = None
         self._reader_task: asyncio.Task | None = None
 
+    def append_log(self, line: str):
+        i = self._logi
+        self._logbuf[i] = line
+        self._logi = 0 if i + 1 == LOG_BUFFER_SIZE else i + 1
+        if self._logn < LOG_BUFFER_SIZE:
+            self._logn += 1
+
+    def extend_logs(self, lines: list[str]):
+        for line in lines:
+            self.append_log(line)
+
+    def clear_logs(self):
+        self._logi = 0
+        self._logn = 0
+
+    def tail(self, k: int) -> list[str]:
+        """Last k buffered lines, oldest first, copying only those k."""
+        k = min(k, self._logn)
+        start = (self._logi - k) % LOG_BUFFER_SIZE
+        end = start + k
+        if end <= LOG_BUFFER_SIZE:
+            return self._logbuf[start:end]
+        return self._logbuf[start:] + self._logbuf[:end - LOG_BUFFER_SIZE]
+
     @property
     def running(self) -> bool:
-        return self.process is not None and self.process.poll() is None
+        return self.process is not None and self.process.returncode is None
 
     @property
     def pid(self) -> int | None:
@@ -53,12 +84,11 @@ class ManagedService:
         return None
 
     def status_dict(self) -> dict:
-        cfg = SERVICE_CONFIG[self.name]
         return {
             "service": self.name,
             "running": self.running,
             "pid": self.pid,
-            "port": cfg["port"],
+            "port": self.port,
             "uptime_seconds": self.uptime_seconds,
         }
 
@@ -80,15 +110,25 @@ async def _log_reader(svc: ManagedService):
     proc = svc.process
     if proc is None or proc.stdout is None:
         return
-    loop = asyncio.get_running_loop()
+    buf = bytearray()
     while True:
-        line = await loop.run_in_executor(None, proc.stdout.readline)
-        if not line:
+        chunk = await proc.stdout.read(READ_CHUNK)
+        if not chunk:
             break
-        svc.logs.append(line.decode("utf-8", errors="replace").rstrip("\n"))
-
-
-def start(name: str) -> dict:
+        buf.extend(chunk)
+        end = buf.rfind(b"\n")
+        if end == -1:
+            continue
+        # One decode for every complete line in the buffer
+        with memoryview(buf) as view:
+            text = str(view[:end], "utf-8", "replace")
+        svc.extend_logs(text.split("\n"))
+        del buf[:end + 1]
+    if buf:
+        svc.append_log(buf.decode("utf-8", errors="replace"))
+
+
+async def start(name: str) -> dict:
     """Start a service subprocess. Returns status dict."""
     svc = _get(name)
     if svc.running:
@@ -98,13 +138,14 @@ def start(name: str) -> dict:
     uvicorn = str(cfg["uvicorn"])
     cmd = [uvicorn, cfg["app"], "--host", "0.0.0.0", "--port", str(cfg["port"])]
 
-    svc.logs.clear()
-    svc.process = subprocess.Popen(
-        cmd,
+    svc.clear_logs()
+    svc.process = await asyncio.create_subprocess_exec(
+        *cmd,
         cwd=str(cfg["cwd"]),
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
+        limit=PIPE_LIMIT,
     )
     svc.started_at = time.time()
 
@@ -129,14 +170,11 @@ async def stop(name: str) -> dict:
         pass
 
     # Wait up to 10s for graceful shutdown
-    loop = asyncio.get_running_loop()
     try:
-        await asyncio.wait_for(
-            loop.run_in_executor(None, proc.wait), timeout=10.0
-        )
+        await asyncio.wait_for(proc.wait(), timeout=10.0)
     except asyncio.TimeoutError:
         proc.kill()
-        await loop.run_in_executor(None, proc.wait)
+        await proc.wait()
 
     # Cancel log reader
     if svc._reader_task and not svc._reader_task.done():
@@ -148,7 +186,7 @@ async def stop(name: str) -> dict:
 async def restart(name: str) -> dict:
     """Stop then start."""
     await stop(name)
-    return start(name)
+    return await start(name)
 
 
 def status(name: str) -> dict:
@@ -161,7 +199,7 @@ def view_logs(name: str, lines: int = 50) -> dict:
     """Return last N lines from the ring buffer."""
     svc = _get(name)
     lines = max(1, min(lines, LOG_BUFFER_SIZE))
-    recent = list(svc.logs)[-lines:]
+    recent = svc.tail(lines)
     return {
         "service": name,
         "lines_requested": lines,
@@ -1,21 +1,67 @@
 """
 MCP Voice Service Control Panel
 ================================
-Streamable-HTTP MCP server on port 8000 providing 12 tools for managing
+Streamable-HTTP MCP server on port 8000 providing 13 tools for managing
 the Whisper STT and Qwen3 TTS FastAPI services.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.utilities.types import Audio
 
 from process_manager import SERVICE_CONFIG
 import process_manager
 import service_proxy
 import gpu_monitor
 
+# Static metadata returned by model_info
+_MODEL_INFO = {
+    "whisper": {
+        "model": "faster-whisper large-v3 (CTranslate2)",
+        "task": "speech-to-text",
+        "port": 8100,
+        "endpoint": "/transcribe",
+        "input": "audio file (multipart upload)",
+        "output": "JSON with text, language, duration",
+    },
+    "tts": {
+        "model": "Qwen/Qwen3-TTS-12Hz-1.7B-CustomVoice",
+        "task": "text-to-speech",
+        "port": 8200,
+        "endpoint": "/synthesize",
+        "input": "JSON with text, speaker, language, instruct",
+        "output": "WAV audio",
+    },
+}
+
+
+_sessions = 0
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # FastMCP enters the lifespan once per session over streamable-http, so
+    # only tear down shared resources when the last one exits.
+    global _sessions
+    _sessions += 1
+    if _sessions == 1:
+        await asyncio.to_thread(gpu_monitor.ensure_init)
+    try:
+        yield
+    finally:
+        _sessions -= 1
+        if _sessions == 0:
+            await gpu_monitor.shutdown()
+            await service_proxy.aclose()
+
+
 mcp = FastMCP(
     "Voice Service Control Panel",
     host="0.0.0.0",
     port=8000,
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------------------------
@@ -25,7 +71,7 @@ mcp = FastMCP(
 @mcp.tool()
 async def service_start(service: str) -> dict:
     """Start a voice service subprocess (whisper or tts)."""
-    return process_manager.start(service)
+    return await process_manager.start(service)
 
 
 @mcp.tool()
@@ -57,19 +103,20 @@ async def service_health(service: str) -> dict:
 
 @mcp.tool()
 async def services_overview() -> dict:
-    """Combined status, health, and GPU info for all services."""
+    """Combined status, health, GPU info, and GPU processes for all services."""
+    names = list(SERVICE_CONFIG)
+    *healths, gpu = await asyncio.gather(
+        *(service_proxy.health(name) for name in names),
+        gpu_monitor.snapshot(),
+        return_exceptions=True,
+    )
     results = {}
-    for name in SERVICE_CONFIG:
-        status = process_manager.status(name)
-        try:
-            health = await service_proxy.health(name)
-        except Exception as e:
-            health = {"status": "unreachable", "error": str(e)}
-        results[name] = {**status, "health": health}
-    try:
-        gpu = await gpu_monitor.gpu_info()
-    except Exception as e:
-        gpu = {"error": str(e)}
+    for name, health in zip(names, healths):
+        if isinstance(health, Exception):
+            health = {"status": "unreachable", "error": str(health)}
+        results[name] = {**process_manager.status(name), "health": health}
+    if isinstance(gpu, Exception):
+        gpu = {"error": str(gpu)}
     return {"services": results, "gpu": gpu}
 
 
@@ -78,9 +125,20 @@ async def services_overview() -> dict:
 # ---------------------------------------------------------------------------
 
 @mcp.tool()
-async def transcribe_audio(audio_base64: str, filename: str = "audio.wav") -> dict:
-    """Transcribe audio via Whisper. Audio must be base64-encoded."""
-    return await service_proxy.transcribe(audio_base64, filename)
+async def transcribe_audio(
+    audio_base64: str = "",
+    filename: str = "",
+    audio_path: str = "",
+) -> dict:
+    """Transcribe audio via Whisper.
+
+    Pass either base64-encoded audio, or audio_path relative to the server's
+    MCP_AUDIO_DIR (streamed to Whisper without re-encoding). filename
+    defaults to the path's basename, or "audio.wav" for base64 input.
+    """
+    return await service_proxy.transcribe(
+        audio_base64, filename, audio_path=audio_path or None
+    )
 
 
 @mcp.tool()
@@ -94,6 +152,18 @@ async def synthesize_speech(
     return await service_proxy.synthesize(text, speaker, language, instruct)
 
 
+@mcp.tool()
+async def synthesize_speech_raw(
+    text: str,
+    speaker: str = "Ryan",
+    language: str = "English",
+    instruct: str = "",
+) -> Audio:
+    """Synthesize speech via Qwen3 TTS. Returns WAV as MCP audio content."""
+    wav, _ = await service_proxy.synthesize_raw(text, speaker, language, instruct)
+    return Audio(data=wav, format="wav")
+
+
 # ---------------------------------------------------------------------------
 # Monitoring
 # ---------------------------------------------------------------------------
@@ -106,7 +176,7 @@ async def view_logs(service: str, lines: int = 50) -> dict:
 
 @mcp.tool()
 async def gpu_info() -> dict:
-    """GPU VRAM, utilization, temperature, and power via nvidia-smi."""
+    """GPU VRAM, utilization, temperature, and power via NVML (or nvidia-smi)."""
     return await gpu_monitor.gpu_info()
 
 
@@ -119,24 +189,7 @@ async def gpu_process_list() -> dict:
 @mcp.tool()
 async def model_info() -> dict:
     """Static metadata about the deployed voice models."""
-    return {
-        "whisper": {
-            "model": "openai/whisper large-v3",
-            "task": "speech-to-text",
-            "port": 8100,
-            "endpoint": "/transcribe",
-            "input": "audio file (multipart upload)",
-            "output": "JSON with text, language, duration",
-        },
-        "tts": {
-            "model": "Qwen/Qwen3-TTS-12Hz-1.7B-CustomVoice",
-            "task": "text-to-speech",
-            "port": 8200,
-            "endpoint": "/synthesize",
-            "input": "JSON with text, speaker, language, instruct",
-            "output": "WAV audio",
-        },
-    }
+    return _MODEL_INFO
 
 
 # ---------------------------------------------------------------------------
@@ -1,16 +1,39 @@
 """Async httpx proxy to the FastAPI services."""
 
 import base64
+import os
+from pathlib import Path
 
 import httpx
 
 TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
 
 SERVICE_URLS = {
     "whisper": "http://localhost:8100",
     "tts": "http://localhost:8200",
 }
 
+# Only files under this directory may be sent by path; unset disables paths
+AUDIO_DIR = os.environ.get("MCP_AUDIO_DIR")
+
+
+# Shared client so keep-alive connections survive across tool calls
+_CLIENT: httpx.AsyncClient | None = None
+
+
+def _client() -> httpx.AsyncClient:
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(timeout=TIMEOUT, limits=LIMITS)
+    return _CLIENT
+
+
+async def aclose():
+    """Close the shared client. The next request opens a fresh one."""
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+
 
 def _url(service: str) -> str:
     if service not in SERVICE_URLS:
@@ -18,46 +41,87 @@ def _url(service: str) -> str:
     return SERVICE_URLS[service]
 
 
+def _audio_file(audio_path: str) -> Path:
+    """Resolve audio_path inside AUDIO_DIR, rejecting anything that escapes it."""
+    if not AUDIO_DIR:
+        raise ValueError("audio_path is disabled; set MCP_AUDIO_DIR to enable it")
+    if os.path.isabs(audio_path) or ".." in Path(audio_path).parts:
+        raise ValueError(f"audio_path must be relative to MCP_AUDIO_DIR: {audio_path!r}")
+    root = Path(AUDIO_DIR).resolve()
+    path = (root / audio_path).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError(f"audio_path escapes MCP_AUDIO_DIR: {audio_path!r}")
+    return path
+
+
 async def health(service: str) -> dict:
     """GET /health on a service."""
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        resp = await client.get(f"{_url(service)}/health")
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _client().get(f"{_url(service)}/health")
+    resp.raise_for_status()
+    return resp.json()
 
 
-async def transcribe(audio_base64: str, filename: str = "audio.wav") -> dict:
-    """POST /transcribe with multipart audio file. Returns transcription dict."""
-    audio_bytes = base64.b64decode(audio_base64)
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        resp = await client.post(
+async def transcribe(
+    audio_base64: str | None = None,
+    filename: str = "",
+    audio_bytes: bytes | None = None,
+    audio_path: str | None = None,
+) -> dict:
+    """POST /transcribe with multipart audio file. Returns transcription dict.
+
+    Audio comes from exactly one of audio_path (relative to MCP_AUDIO_DIR,
+    streamed from disk), audio_bytes (sent as-is) or audio_base64. An empty
+    filename defaults to the path's basename, else "audio.wav".
+    """
+    if audio_path:
+        path = _audio_file(audio_path)
+        with open(path, "rb") as f:
+            resp = await _client().post(
+                f"{_url('whisper')}/transcribe",
+                files={"audio": (filename or path.name, f)},
+            )
+    else:
+        if audio_bytes is None:
+            if not audio_base64:
+                raise ValueError("One of audio_base64, audio_bytes or audio_path is required")
+            audio_bytes = base64.b64decode(audio_base64)
+        resp = await _client().post(
             f"{_url('whisper')}/transcribe",
-            files={"audio": (filename, audio_bytes)},
+            files={"audio": (filename or "audio.wav", audio_bytes)},
         )
-        resp.raise_for_status()
-        return resp.json()
+    resp.raise_for_status()
+    return resp.json()
 
 
-async def synthesize(
+async def synthesize_raw(
     text: str,
     speaker: str = "Ryan",
     language: str = "English",
     instruct: str = "",
-) -> dict:
-    """POST /synthesize, returns base64-encoded WAV + metadata."""
+) -> tuple[bytes, str | None]:
+    """POST /synthesize, returns (WAV bytes, X-Duration header)."""
     payload = {
         "text": text,
         "speaker": speaker,
         "language": language,
         "instruct": instruct,
     }
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        resp = await client.post(f"{_url('tts')}/synthesize", json=payload)
-        resp.raise_for_status()
-        wav_b64 = base64.b64encode(resp.content).decode("ascii")
-        return {
-            "audio_base64": wav_b64,
-            "format": "wav",
-            "size_bytes": len(resp.content),
-            "synthesis_duration": resp.headers.get("X-Duration"),
-        }
+    resp = await _client().post(f"{_url('tts')}/synthesize", json=payload)
+    resp.raise_for_status()
+    return resp.content, resp.headers.get("X-Duration")
+
+
+async def synthesize(
+    text: str,
+    speaker: str = "Ryan",
+    language: str = "English",
+    instruct: str = "",
+) -> dict:
+    """POST /synthesize, returns base64-encoded WAV + metadata."""
+    wav, duration = await synthesize_raw(text, speaker, language, instruct)
+    return {
+        "audio_base64": base64.b64encode(wav).decode("ascii"),
+        "format": "wav",
+        "size_bytes": len(wav),
+        "synthesis_duration": duration,
+    }
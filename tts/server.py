@@ -3,19 +3,31 @@ Qwen3-TTS synthesis API — Cyclone (RTX 5070 Ti)
 Model: Qwen3-TTS-12Hz-1.7B-CustomVoice on CUDA
 """
 
+import asyncio
 import io
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from functools import partial
 
 import torch
 import soundfile as sf
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 
 MODEL_ID = "Qwen/Qwen3-TTS-12Hz-1.7B-CustomVoice"
+COMPILE = os.environ.get("TTS_COMPILE", "0") == "1"
+_CUDA = torch.cuda.is_available()
+_DEVICE = "cuda" if _CUDA else "cpu"
 model = None
 
+# Every model call (warm-up included) runs on this one thread: the talker
+# keeps per-call state (rope_deltas) on the module, so generate calls must
+# not overlap.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-model")
+
 
 class SynthesizeRequest(BaseModel):
     text: str
@@ -24,12 +36,37 @@ class SynthesizeRequest(BaseModel):
     instruct: str = ""
 
 
+def _compile(model):
+    """torch.compile the decoder stacks the generate loop steps through.
+
+    Each talker step runs talker.model once and code_predictor.model once
+    per code group. Their DynamicCache KV length grows every step, so
+    compile with dynamic shapes and without CUDA graphs. Compilation is
+    lazy; if the warm-up raises, restore eager mode.
+    """
+    modules = []
+    try:
+        talker = model.model.talker
+        modules = [talker.model, talker.code_predictor.model]
+        for m in modules:
+            m.forward = torch.compile(m.forward, dynamic=True)
+        model.generate_custom_voice(
+            text="Hello.", speaker="Ryan", language="English", instruct=""
+        )
+        print("[tts] Using torch.compile on talker + code predictor")
+    except Exception as e:
+        for m in modules:
+            # Drop the instance override; the class forward is eager
+            m.__dict__.pop("forward", None)
+        print(f"[tts] torch.compile unavailable, using eager mode: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global model
     from qwen_tts import Qwen3TTSModel
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    device = _DEVICE
     print(f"[tts] Loading {MODEL_ID} on {device}...")
 
     # Try flash_attention_2, fall back to default (e.g. on Windows)
@@ -49,27 +86,31 @@ async def lifespan(app: FastAPI):
         )
         print("[tts] Using default attention")
 
+    if COMPILE and device == "cuda":
+        await asyncio.get_running_loop().run_in_executor(_executor, _compile, model)
+
     print("[tts] Ready -- http://0.0.0.0:8200")
     yield
     model = None
 
 
-app = FastAPI(title="Qwen3-TTS API", lifespan=lifespan)
+app = FastAPI(
+    title="Qwen3-TTS API", lifespan=lifespan, default_response_class=ORJSONResponse
+)
 
 
 @app.get("/health")
 def health():
-    device = "cuda" if torch.cuda.is_available() else "cpu"
     return {
         "status": "ok",
         "model": MODEL_ID,
-        "device": device,
-        "cuda_available": torch.cuda.is_available(),
+        "device": _DEVICE,
+        "cuda_available": _CUDA,
     }
 
 
 @app.post("/synthesize")
-def synthesize(req: SynthesizeRequest):
+async def synthesize(req: SynthesizeRequest):
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
@@ -78,20 +119,24 @@ def synthesize(req: SynthesizeRequest):
 
     try:
         start = time.time()
-        wavs, sr = model.generate_custom_voice(
-            text=req.text,
-            speaker=req.speaker,
-            language=req.language,
-            instruct=req.instruct if req.instruct else "",
+        wavs, sr = await asyncio.get_running_loop().run_in_executor(
+            _executor,
+            partial(
+                model.generate_custom_voice,
+                text=req.text,
+                speaker=req.speaker,
+                language=req.language,
+                instruct=req.instruct if req.instruct else "",
+            ),
         )
         elapsed = round(time.time() - start, 3)
 
         buf = io.BytesIO()
         sf.write(buf, wavs[0], sr, format="WAV")
-        buf.seek(0)
 
+        # getvalue() hands back the BytesIO's own bytes object, no copy
         return Response(
-            content=buf.read(),
+            content=buf.getvalue(),
             media_type="audio/wav",
             headers={"X-Duration": str(elapsed)},
         )
@@ -3,71 +3,110 @@ Whisper transcription API — Cyclone (RTX 5070)
 Model: large-v3 on CUDA
 """
 
+import asyncio
 import io
+import math
 import time
-import tempfile
 import os
 from contextlib import asynccontextmanager
 
-import torch
-import whisper
+import numpy as np
+import soundfile as sf
+import ctranslate2
+from faster_whisper import WhisperModel
+from scipy.signal import resample_poly
 from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 MODEL_NAME = os.environ.get("WHISPER_MODEL", "large-v3")
+SAMPLE_RATE = 16000
+WAV_TYPES = {"audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave"}
+_CUDA = ctranslate2.get_cuda_device_count() > 0
+_DEVICE = "cuda" if _CUDA else "cpu"
 model = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global model
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"[whisper] Loading {MODEL_NAME} on {device}...")
-    model = whisper.load_model(MODEL_NAME, device=device)
+    device = _DEVICE
+    compute_type = os.environ.get(
+        "WHISPER_COMPUTE_TYPE", "float16" if device == "cuda" else "int8"
+    )
+    print(f"[whisper] Loading {MODEL_NAME} on {device} ({compute_type})...")
+    model = WhisperModel(MODEL_NAME, device=device, compute_type=compute_type)
     print(f"[whisper] Ready")
     yield
     model = None
 
 
-app = FastAPI(title="Whisper API", lifespan=lifespan)
+app = FastAPI(
+    title="Whisper API", lifespan=lifespan, default_response_class=ORJSONResponse
+)
 
 
 @app.get("/health")
 def health():
-    device = "cuda" if torch.cuda.is_available() else "cpu"
     return {
         "status": "ok",
         "model": MODEL_NAME,
-        "device": device,
-        "cuda_available": torch.cuda.is_available(),
+        "device": _DEVICE,
+        "cuda_available": _CUDA,
     }
 
 
+def _transcribe(audio_input) -> tuple[str, str]:
+    """Run faster-whisper and drain its lazy segment generator."""
+    segments, info = model.transcribe(audio_input, beam_size=5, vad_filter=True)
+    text = "".join(seg.text for seg in segments)
+    return text, info.language
+
+
+def _load_wav(f) -> np.ndarray:
+    """Decode a WAV file object to mono float32 at whisper's sample rate."""
+    data, sr = sf.read(f, dtype="float32", always_2d=False)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if sr != SAMPLE_RATE:
+        g = math.gcd(sr, SAMPLE_RATE)
+        data = resample_poly(data, SAMPLE_RATE // g, sr // g).astype(np.float32)
+    return data
+
+
 @app.post("/transcribe")
 async def transcribe(audio: UploadFile = File(...)):
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
-    contents = await audio.read()
-    if not contents:
-        raise HTTPException(status_code=400, detail="Empty audio file")
-
-    # Write to temp file (whisper needs a path)
     suffix = os.path.splitext(audio.filename or "audio.wav")[1] or ".wav"
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-        tmp.write(contents)
-        tmp_path = tmp.name
+
+    # PCM WAV decodes in-process; faster-whisper decodes everything else
+    # (via PyAV) straight from the spooled upload.
+    audio_input = None
+    if audio.content_type in WAV_TYPES or suffix.lower() == ".wav":
+        try:
+            audio_input = await asyncio.to_thread(_load_wav, audio.file)
+        except RuntimeError:
+            await audio.seek(0)
+        else:
+            if audio_input.size == 0:
+                raise HTTPException(status_code=400, detail="Empty audio file")
+
+    if audio_input is None:
+        audio.file.seek(0, os.SEEK_END)
+        if audio.file.tell() == 0:
+            raise HTTPException(status_code=400, detail="Empty audio file")
+        audio.file.seek(0)
+        audio_input = audio.file
 
     try:
         start = time.time()
-        result = whisper.transcribe(model, tmp_path, fp16=torch.cuda.is_available())
+        text, language = await asyncio.to_thread(_transcribe, audio_input)
         elapsed = round(time.time() - start, 2)
-        return JSONResponse({
-            "text": result["text"].strip(),
-            "language": result.get("language", "unknown"),
+        return ORJSONResponse({
+            "text": text.strip(),
+            "language": language or "unknown",
             "duration": elapsed,
         })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        os.unlink(tmp_path)